@@ -371,6 +371,14 @@ max_text_length_option = click.option(
     help="Maximum text length in characters for each input chunk."
     " By default, the entire input is passed to the model.",
 )
+workers_option = click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of documents to extract from concurrently."
+    " Results are still written in input order.",
+)
 
 
 @click.group()
@@ -424,6 +432,7 @@ def main(verbose: int, quiet: bool, cache_db: str):
 @cut_input_text_option
 @selectcols_option
 @max_text_length_option
+@workers_option
 def extract(
     inputfile,
     template,
@@ -443,6 +452,7 @@ def extract(
     system_message,
     selectcols,
     max_text_length,
+    workers,
     **kwargs,
 ):
     """Extract knowledge from text guided by schema, using SPIRES engine.
@@ -461,6 +471,8 @@ def extract(
     This is not recursive.
     Otherwise, the input is assumed to be a string to be read as input.
 
+    Use --workers to extract from several documents in a directory at once.
+
     You can also use fragments of existing schemas, use the --target-class option (-T) to
     specify an alternative Container/root class.
 
@@ -510,14 +522,12 @@ def extract(
     else:
         target_class_def = None
 
-    i = 0
-    for input_entry in inputlist:
+    all_results = ke.extract_from_texts(
+        texts=inputlist, cls=target_class_def, show_prompt=show_prompt, workers=workers
+    )
+    for i, results in enumerate(all_results, start=1):
         if len(inputlist) > 1:
-            i = i + 1
-            logging.info(f"Now extracting from file {i} of {len(inputlist)}")
-        results = ke.extract_from_text(
-            text=input_entry, cls=target_class_def, show_prompt=show_prompt
-        )
+            logging.info(f"Extracted from file {i} of {len(inputlist)}")
         if set_slot_value:
             for slot_value in set_slot_value:
                 slot, value = slot_value.split("=")
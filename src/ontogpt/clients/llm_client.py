@@ -1,13 +1,18 @@
 """Client for running LLM completion requests through LiteLLM."""
 
+import asyncio
+import contextlib
 import logging
 import sys
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
+from typing import Any, Dict, List
 
 import litellm
 import numpy as np
 import openai  # For error handling
-from litellm import completion, embedding
+from litellm import acompletion, aembedding, completion, embedding
 from litellm.caching.caching import Cache
 from oaklib.utilities.apikey_manager import get_apikey_value
 
@@ -21,6 +26,17 @@ SERVICES = {model.split("/")[0] for model in MODELS.keys() if len(model.split("/
 # Necessary to avoid repeated debug messages
 litellm.suppress_debug_info = True
 
+# Default maximum number of concurrent async requests per client
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Semaphores limiting concurrent requests per provider, for each event loop
+_PROVIDER_SEMAPHORES: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+class _NullAsyncContext(contextlib.AbstractAsyncContextManager):
+    async def __aexit__(self, *exc_info):
+        return None
+
 
 @dataclass
 class LLMClient:
@@ -40,6 +56,17 @@ class LLMClient:
     system_message: str = ""
     """System message to be provided to the LLM."""
 
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    """Maximum number of async requests this client may have in flight at once."""
+
+    provider_concurrency: Dict[str, int] = field(default_factory=dict)
+    """Maximum number of async requests in flight per provider, e.g. {"ollama": 1}.
+    These limits are shared by all clients using the same provider."""
+
+    _semaphores: Dict[asyncio.AbstractEventLoop, asyncio.Semaphore] = field(
+        default_factory=weakref.WeakKeyDictionary, init=False, repr=False
+    )
+
     def __post_init__(self):
         # Get appropriate API key for the model source
         # and other details if needed.
@@ -84,6 +111,15 @@ class LLMClient:
         else:
             litellm.cache = Cache(disk_cache_dir=self.cache_db_path)
 
+    @property
+    def provider(self) -> str:
+        """Name of the service provider for the model, e.g. openai or ollama."""
+        if self.custom_llm_provider:
+            return self.custom_llm_provider
+        if self.model in MODELS and "litellm_provider" in MODELS[self.model]:
+            return MODELS[self.model]["litellm_provider"]
+        return self.model.split("/")[0]
+
     def complete(self, prompt, show_prompt: bool = False, **kwargs) -> str:
 
         logger.info(f"Complete: engine={self.model}, prompt[{len(prompt)}]={prompt[0:100]}...")
@@ -92,75 +128,155 @@ class LLMClient:
 
         response = None
 
+        try:
+            # TODO: expose user prompt to CLI
+            response = completion(**self._completion_args(prompt))
+        except Exception as e:
+            self._handle_completion_error(e)
+
+        return self._completion_payload(response)
+
+    async def acomplete(self, prompt, show_prompt: bool = False, **kwargs) -> str:
+        """Asynchronous version of complete.
+
+        The number of requests in flight is bounded by max_concurrency for this client,
+        and by provider_concurrency across all clients using the same provider.
+        Cancelling the calling task cancels the request.
+        """
+        logger.info(f"Complete (async): engine={self.model}, prompt[{len(prompt)}]...")
+        if show_prompt:
+            logger.info(f" SENDING PROMPT:\n{prompt}")
+
+        response = None
+
+        async with self._client_semaphore(), self._provider_semaphore():
+            try:
+                response = await acompletion(**self._completion_args(prompt))
+            except Exception as e:
+                self._handle_completion_error(e)
+
+        return self._completion_payload(response)
+
+    async def acomplete_many(self, prompts: List[str], show_prompt: bool = False) -> List[str]:
+        """Run completions for all prompts concurrently, returning payloads in prompt order."""
+        tasks = [
+            asyncio.ensure_future(self.acomplete(prompt, show_prompt=show_prompt))
+            for prompt in prompts
+        ]
+        try:
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+    def complete_many(self, prompts: List[str], show_prompt: bool = False) -> List[str]:
+        """Run completions for all prompts concurrently from synchronous code.
+
+        Payloads are returned in the same order as the prompts.
+        """
+        if len(prompts) == 1:
+            return [self.complete(prompts[0], show_prompt=show_prompt)]
+        coro = self.acomplete_many(prompts, show_prompt=show_prompt)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        # Already inside an event loop (e.g. the web app), so use a separate one
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coro).result()
+
+    def _completion_args(self, prompt: str) -> Dict[str, Any]:
         these_messages = [{"content": prompt, "role": "user"}]
 
         if self.system_message:
             these_messages.insert(0, {"content": self.system_message, "role": "system"})
 
+        return dict(
+            api_key=self.api_key,
+            api_base=self.api_base,
+            api_version=self.api_version,
+            model=self.model,
+            messages=these_messages,
+            temperature=self.temperature,
+            caching=True,
+            custom_llm_provider=self.custom_llm_provider,
+        )
+
+    def _completion_payload(self, response) -> str:
+        if response is not None:
+            payload = response.choices[0].message.content
+        else:
+            logger.error("No response or response is empty.")
+            payload = ""
+        return payload
+
+    def _handle_completion_error(self, e: Exception) -> None:
+        """Log an error from a completion request, exiting if it cannot be recovered from."""
         # This toggle controls whether we can continue or not.
         # Some errors may be temporary, while others, such as authentication errors,
         # require action before we may continue.
         force_stop = False
 
-        try:
-            # TODO: expose user prompt to CLI
-            response = completion(
-                api_key=self.api_key,
-                api_base=self.api_base,
-                api_version=self.api_version,
-                model=self.model,
-                messages=these_messages,
-                temperature=self.temperature,
-                caching=True,
-                custom_llm_provider=self.custom_llm_provider,
-            )
-        except openai.APITimeoutError as e:
+        if isinstance(e, openai.APITimeoutError):
             logger.error(f"Encountered API timeout error: {e}")
-        except litellm.exceptions.AuthenticationError as e:
+        elif isinstance(e, litellm.exceptions.AuthenticationError):
             logger.error(f"Encountered authentication error: {e}")
             force_stop = True
-        except litellm.exceptions.NotFoundError as e:
+        elif isinstance(e, litellm.exceptions.NotFoundError):
             logger.error(f"Encountered error due to unrecognized model or endpoint: {e}")
             force_stop = True
-        except litellm.exceptions.BadRequestError as e:
+        elif isinstance(e, litellm.exceptions.BadRequestError):
             logger.error(f"Encountered error due to bad request: {e}")
             force_stop = True
-        except litellm.exceptions.UnprocessableEntityError as e:
+        elif isinstance(e, litellm.exceptions.UnprocessableEntityError):
             logger.error(f"Encountered error due to unprocessable entity: {e}")
-        except litellm.exceptions.PermissionDeniedError as e:
+        elif isinstance(e, litellm.exceptions.PermissionDeniedError):
             logger.error(f"Encountered error - permission denied: {e}")
             force_stop = True
-        except litellm.exceptions.RateLimitError as e:
+        elif isinstance(e, litellm.exceptions.RateLimitError):
             logger.error(f"Encountered rate limiting: {e}")
-        except litellm.exceptions.ContextWindowExceededError as e:
+        elif isinstance(e, litellm.exceptions.ContextWindowExceededError):
             logger.error(f"Exceeded context window: {e}")
-        except litellm.exceptions.ServiceUnavailableError as e:
+        elif isinstance(e, litellm.exceptions.ServiceUnavailableError):
             logger.error(f"Service unavailable: {e}")
             force_stop = True
-        except litellm.exceptions.InternalServerError as e:
+        elif isinstance(e, litellm.exceptions.InternalServerError):
             logger.error(f"Internal server error: {e}")
             force_stop = True
-        except litellm.exceptions.APIError as e:
+        elif isinstance(e, litellm.exceptions.APIError):
             logger.error(f"API returned an invalid response: {e}")
-        except litellm.exceptions.APIConnectionError as e:
+        elif isinstance(e, litellm.exceptions.APIConnectionError):
             logger.error(f"API connection error: {e}")
-        except Exception as e:
+        else:
             logger.error(f"Encountered error: {type(e)}, Error: {e}")
 
         if force_stop:
             sys.exit("Exiting...")
 
-        if response is not None:
-            payload = response.choices[0].message.content
-        else:
-            logger.error("No response or response is empty.")
-            payload = ""
-
-        return payload
-
-    def embeddings(self, text: str):
-        text = str(text)
-
+    def _client_semaphore(self) -> contextlib.AbstractAsyncContextManager:
+        """Get the semaphore bounding requests from this client in the running event loop."""
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphores[loop]
+
+    def _provider_semaphore(self) -> contextlib.AbstractAsyncContextManager:
+        """Get the semaphore bounding requests to this provider in the running event loop.
+
+        This is shared by all clients for the same provider.
+        If there is no limit for the provider, a no-op context is returned.
+        """
+        provider = self.provider
+        limit = self.provider_concurrency.get(provider)
+        if not limit:
+            return _NullAsyncContext()
+        semaphores = _PROVIDER_SEMAPHORES.setdefault(asyncio.get_running_loop(), {})
+        if provider not in semaphores:
+            semaphores[provider] = asyncio.Semaphore(limit)
+        return semaphores[provider]
+
+    def _embedding_args(self, text: str) -> Dict[str, Any]:
         # TODO: set embedding model based on model source
         # Or at least set the default for OpenAI models
         if self.model is None:
@@ -170,7 +286,7 @@ class LLMClient:
 
         logger.info(f"Retrieving embeddings from {model} for text: {text[0:80]}...")
 
-        response = embedding(
+        return dict(
             api_key=self.api_key,
             api_base=self.api_base,
             api_version=self.api_version,
@@ -179,6 +295,7 @@ class LLMClient:
             caching=True,
         )
 
+    def _embedding_payload(self, response):
         if response is not None:
             payload = response.data[0]["embedding"]
         else:
@@ -187,6 +304,18 @@ class LLMClient:
 
         return payload
 
+    def embeddings(self, text: str):
+        text = str(text)
+        response = embedding(**self._embedding_args(text))
+        return self._embedding_payload(response)
+
+    async def aembeddings(self, text: str):
+        """Asynchronous version of embeddings, bounded like acomplete."""
+        text = str(text)
+        async with self._client_semaphore(), self._provider_semaphore():
+            response = await aembedding(**self._embedding_args(text))
+        return self._embedding_payload(response)
+
     def similarity(self, text1: str, text2: str, **kwargs):
         a1 = self.embeddings(text1, **kwargs)
         a2 = self.embeddings(text2, **kwargs)
@@ -9,13 +9,16 @@ Described in the SPIRES manuscript.
 See https://arxiv.org/abs/2304.02711
 """
 
+import copy
 import json
 import logging
 import re
 import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import pydantic
 import yaml
@@ -169,6 +172,49 @@ class SPIRESEngine(KnowledgeEngine):
             # not the full list of all named entities across all extractions
         )
 
+    def extract_from_texts(
+        self,
+        texts: Iterable[str],
+        cls: ClassDefinition = None,
+        show_prompt: bool = False,
+        workers: int = 1,
+    ) -> Iterator[ExtractionResult]:
+        """
+        Extract annotations from each of the given texts.
+
+        With more than one worker, extractions run concurrently in a thread pool.
+        Each text is then handled by a shallow copy of this engine with its own
+        named entity buffers, so documents do not share mutable state.
+        Results are always yielded in the same order as the input texts.
+
+        :param texts:
+        :param cls:
+        :param show_prompt:
+        :param workers: maximum number of extractions to run at once
+        :return:
+        """
+        if workers <= 1:
+            for text in texts:
+                yield self.extract_from_text(text=text, cls=cls, show_prompt=show_prompt)
+            return
+
+        def _extract(text: str) -> ExtractionResult:
+            engine = copy.copy(self)
+            engine.named_entities = []
+            engine.extracted_named_entities = []
+            return engine.extract_from_text(text=text, cls=cls, show_prompt=show_prompt)
+
+        # Keep a bounded number of documents in flight so results
+        # can be written out as soon as the earliest one completes
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending: Deque[Future] = deque()
+            for text in texts:
+                pending.append(executor.submit(_extract, text))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
     def _extract_from_text_to_dict(self, text: str, cls: ClassDefinition = None) -> RESPONSE_DICT:
         raw_text = self._raw_extract(text=text, cls=cls)
         return self._parse_response_to_dict(raw_text, cls)
@@ -0,0 +1,39 @@
+"""Unit tests for the SPIRES engine that do not call an LLM."""
+
+import time
+import unittest
+import unittest.mock as mock
+
+from ontogpt.engines.spires_engine import SPIRESEngine
+from ontogpt.io.template_loader import get_template_details
+from ontogpt.templates.core import ExtractionResult, NamedEntity
+
+TEMPLATE = "gocam.GoCamAnnotations"
+
+
+class TestSPIRESEngineUnit(unittest.TestCase):
+    """Test SPIRES engine behavior with a mocked completion client."""
+
+    def setUp(self) -> None:
+        """Set up."""
+        template_details = get_template_details(template=TEMPLATE)
+        self.ke = SPIRESEngine(template_details=template_details, model="fake/model", mappers=[])
+
+    def test_extract_from_texts_order_and_isolation(self):
+        """Concurrent extractions are yielded in input order with their own entities."""
+        texts = [f"doc{i}" for i in range(8)]
+
+        def _fake_extract(engine, text, cls=None, object=None, show_prompt=False):
+            # Later documents finish first
+            time.sleep(0.01 * (len(texts) - int(text[3:])))
+            engine.extracted_named_entities = [NamedEntity(id=f"X:{text}", label=text)]
+            return ExtractionResult(
+                input_text=text, named_entities=engine.extracted_named_entities
+            )
+
+        with mock.patch.object(SPIRESEngine, "extract_from_text", _fake_extract):
+            results = list(self.ke.extract_from_texts(texts, workers=4))
+        self.assertEqual([r.input_text for r in results], texts)
+        for r in results:
+            self.assertEqual([ne.label for ne in r.named_entities], [r.input_text])
+        self.assertEqual(self.ke.extracted_named_entities, [])